@@ -1,14 +1,22 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from services.assignment_service import AssignmentService
-from models.scheduling_model import Course, Instructor, Room, CourseAssignment
-from services.conflict_service import ConflictRequest, check_schedule_conflict_logic
-from models.scheduling_model import ScheduleData, ConflictRequest
-from pydantic import BaseModel
-from typing import List
+from services.assignment_service import AssignmentService, solve_department
+from services.conflict_service import check_schedule_conflict_logic
+from services.schedule_service import ScheduleService
+from models.scheduling_model import ConflictRequest, Course, Instructor, ScheduleRequest
+from typing import Any, Dict, List
+from utils.executor import DEPT_POOL, run_in_executor, shutdown_executors
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_executors()
 
 #  python -m uvicorn main:app --reload --port 9000 run this
-app = FastAPI(title="Sched_AI")
+# Endpoints declare return types so FastAPI serializes them straight to JSON bytes via Pydantic
+app = FastAPI(title="Sched_AI", lifespan=lifespan)
 
 # --- Allow Laravel access ---
 app.add_middleware(
@@ -19,45 +27,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# One shared instance (just solver options) serves every request
+assignment_service = AssignmentService()
+
 @app.get("/")
-def root():
+def root() -> Dict[str, str]:
     return {"message": "FastAPI is running!"}
 
-class AssignmentRequest(BaseModel):
-    courses: List[Course]
-    instructors: List[Instructor]
-
 @app.post("/assign-courses")
-def assign_courses(courses: List[Course], instructors: List[Instructor]):
-    service = AssignmentService()
-    assignments = service.assign_courses(courses, instructors)
+async def assign_courses(courses: List[Course], instructors: List[Instructor]) -> Dict[str, List[Dict[str, str]]]:
+    # Each department is an independent solve; run them side by side in the department pool
+    jobs = assignment_service.plan_departments(courses, instructors)
+    results = await asyncio.gather(*(run_in_executor(solve_department, dept_courses, insts, assignment_service.options, pool=DEPT_POOL) for _, dept_courses, insts in jobs))
 
     return {
         "recommended_instructors": [
-            {"id": a.instructor_id, "course_id": a.course_id} for a in assignments
+            {"id": a.instructor_id, "course_id": a.course_id} for dept_assignments in results for a in dept_assignments
         ]
     }
 
-# --- Request body model ---
-class ScheduleRequest(BaseModel):
-    assignments: List[CourseAssignment]
-    timeslots: List[str]
-
 # --- Endpoint ---
 @app.post("/scheduling")
-def generate_schedule(data: ScheduleRequest):
+def generate_schedule(data: ScheduleRequest) -> Dict[str, Any]:
     """
-    Generate a weekly class schedule based on course assignments and available time slots.
+    Generate a weekly class schedule based on course assignments and course units.
     """
     service = ScheduleService()
-    schedule = service.generate_schedule(
-        assignments=data.assignments,
-        timeslots=data.timeslots
-    )
+    try:
+        schedule = service.generate_schedule(
+            assignments=data.assignments,
+            courses=data.courses
+        )
+    except ValueError as ve:
+        # Not enough weekly slots for the requested units
+        raise HTTPException(status_code=400, detail=str(ve))
     return {"schedule": schedule}
 
 @app.post("/check_schedule_conflict")
-def check_schedule_conflict(request: ConflictRequest):
+def check_schedule_conflict(request: ConflictRequest) -> Dict[str, Any]:
     """
     Delegates conflict checking to conflict_service.py
     """
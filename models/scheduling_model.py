@@ -1,12 +1,16 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict
+from typing import Any, Dict, List, Optional
 
 class Room(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     room_name: str
     room_type: str
 
 class Course(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     name: str
     units: int
@@ -15,20 +19,35 @@ class Course(BaseModel):
     academic_years_id: str
 
 class Instructor(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     user_id: str
     dept_id: str
     max_load: int = 12
 
 class CourseAssignment(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     course_id: str
     instructor_id: str
+    room_id: Optional[str] = None
+
+class ScheduleRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    assignments: List[CourseAssignment]
+    courses: List[Course]  # units per course decide how many hourly slots each assignment takes
 
 class YearAndSection(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     year: int
     section: str
 
 class ScheduleData(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     academic_year_id: str
     trimester_id: str
@@ -43,5 +62,20 @@ class ScheduleData(BaseModel):
 
 
 class ConflictRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     new_schedule: ScheduleData
     existing_schedules: List[ScheduleData]
+
+
+# Body of sched_AI's POST /schedule; None fields fall back to the built-in defaults
+class SchedulerConfig(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    sections: Optional[List[str]] = None
+    subjects: Optional[List[List]] = None  # list of tuples/lists: [code, title, duration, needs_lab]
+    room_names: Optional[List[str]] = None
+    comlab_room_indices: Optional[List[int]] = None
+    days: Optional[List[str]] = None
+    teachers: Optional[List[Dict[str, Any]]] = None
+    hours_per_day: Optional[int] = None
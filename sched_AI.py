@@ -1,11 +1,28 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import Optional, Dict, Any
 from ortools.sat.python import cp_model
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import replace
+import hashlib
+import json
 import math
+from operator import itemgetter
+from models.scheduling_model import SchedulerConfig
+from utils.executor import run_in_executor, shutdown_executors
+from utils.solver_settings import SolverOptions, cp_workers
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pre-warm the default-config result so the first GET /schedule returns instantly
+    try:
+        await _solve_cached(None)
+    except Exception as e:
+        print("Default schedule pre-warm failed:", e)
+    yield
+    shutdown_executors()
 
-app = FastAPI(title="Sched_AI")
+app = FastAPI(title="Sched_AI", lifespan=lifespan)
 
 # ----------------------------
 # Default Configuration (user-editable)
@@ -44,18 +61,6 @@ default_teachers = [
     {"id": 4, "name": "Lt. Mark Dela Rosa", "department": "ROTC", "can_teach": ["MLC 1101"]},
 ]
 
-# ----------------------------
-# Request / response models
-# ----------------------------
-class SchedulerConfig(BaseModel):
-    sections: Optional[List[str]] = None
-    subjects: Optional[List[List]] = None  # list of tuples/lists: [code, title, duration, needs_lab]
-    room_names: Optional[List[str]] = None
-    comlab_room_indices: Optional[List[int]] = None
-    days: Optional[List[str]] = None
-    teachers: Optional[List[Dict[str, Any]]] = None
-    hours_per_day: Optional[int] = None
-
 # ----------------------------
 # Helper functions
 # ----------------------------
@@ -65,50 +70,47 @@ def slot_to_day_hour(slot: int, hours_per_day_local: int, start_hour_local: int)
     hour = start_hour_local + hour_in_day
     return day, hour
 
+# "12:00 AM" .. "11:00 PM", indexed by hour of day
+_HOUR_LABELS = tuple(f"{(h - 1) % 12 + 1}:00 {'AM' if h < 12 else 'PM'}" for h in range(24))
+
 def format_hour(h: int):
-    suffix = "AM"
-    display_hour = h
-    if h == 12:
-        suffix = "PM"
-        display_hour = 12
-    elif h == 0:
-        display_hour = 12
-        suffix = "AM"
-    elif h > 12:
-        display_hour = h - 12
-        suffix = "PM"
-    else:
-        suffix = "AM"
-    return f"{display_hour}:00 {suffix}"
+    return _HOUR_LABELS[h % 24]
 
 def precheck_config(sections, subjects, room_names, comlab_room_indices, hours_per_day, days, teachers):
     num_days = len(days)
     H = hours_per_day * num_days
     errors = []
-    per_section_total = sum(s[2] for s in subjects)
+
+    # Single pass over subjects
+    per_section_total = lab_total = nonlab_total = 0
+    subject_codes = set()
+    for s in subjects:
+        dur = s[2]
+        per_section_total += dur
+        subject_codes.add(s[0])
+        if s[3]:
+            lab_total += dur
+        else:
+            nonlab_total += dur
+
     weekly_hours = H
     if per_section_total > weekly_hours:
         errors.append(f"Each section requires {per_section_total} hours/week but only {weekly_hours} hours are available (per section).")
 
-    total_lab_hours_needed = sum(s[2] for s in subjects if s[3]) * len(sections)
+    total_lab_hours_needed = lab_total * len(sections)
     lab_capacity = len(comlab_room_indices) * H
     if total_lab_hours_needed > lab_capacity:
         errors.append(f"Total lab hours required = {total_lab_hours_needed} but lab capacity = {lab_capacity} (comlabs * available slots).")
 
-    nonlab_hours_needed = sum(s[2] for s in subjects if not s[3]) * len(sections)
+    nonlab_hours_needed = nonlab_total * len(sections)
     classroom_capacity = (len(room_names) - len(comlab_room_indices)) * H
     if nonlab_hours_needed > classroom_capacity:
         errors.append(f"Total classroom hours required for non-lab subjects = {nonlab_hours_needed} but classroom capacity = {classroom_capacity} (non-comlab rooms * available slots).")
 
     # Teacher coverage check: every subject must have at least one teacher who can teach it
-    subject_codes = {s[0] for s in subjects}
-    teacher_can = defaultdict(list)
-    for t in teachers:
-        for sc in t.get("can_teach", []):
-            teacher_can[sc].append(t["name"])
-    for sc in subject_codes:
-        if sc not in teacher_can or len(teacher_can[sc]) == 0:
-            errors.append(f"No teacher listed can teach subject {sc}. Add teachers or update 'can_teach' lists.")
+    covered = {sc for t in teachers for sc in t.get("can_teach", ())}
+    for sc in sorted(subject_codes - covered):
+        errors.append(f"No teacher listed can teach subject {sc}. Add teachers or update 'can_teach' lists.")
 
     return errors
 
@@ -123,13 +125,13 @@ def build_and_solve(sections=default_sections,
                     teachers=default_teachers,
                     hours_per_day_local=hours_per_day,
                     start_hour_local=start_hour,
-                    solver_time_limit_seconds=15):
+                    solver_time_limit_seconds=None,
+                    solver_options=None):
     num_days = len(days)
     H = hours_per_day_local * num_days
     num_sections = len(sections)
     num_subjects = len(subjects)
     num_rooms = len(room_names)
-    num_teachers = len(teachers)
     all_instances = [(sec_i, subj_i) for sec_i in range(num_sections) for subj_i in range(num_subjects)]
 
     # pre-check
@@ -141,50 +143,40 @@ def build_and_solve(sections=default_sections,
 
     # Variables
     starts = {}
-    ends = {}
     intervals = {}
-    assign_room = {}
-    assign_teacher = {}
+    room_of = {}
+    teacher_of = {}
 
     for sec_i, subj_i in all_instances:
         dur = subjects[subj_i][2]
         max_start = H - dur
         starts[(sec_i, subj_i)] = model.new_int_var(0, max_start, f"start_s{sec_i}_sub{subj_i}")
-        ends[(sec_i, subj_i)] = model.new_int_var(dur, H, f"end_s{sec_i}_sub{subj_i}")
-        intervals[(sec_i, subj_i)] = model.new_interval_var(starts[(sec_i, subj_i)], dur, ends[(sec_i, subj_i)], f"iv_s{sec_i}_sub{subj_i}")
-        for r in range(num_rooms):
-            assign_room[(sec_i, subj_i, r)] = model.new_bool_var(f"assign_s{sec_i}_sub{subj_i}_r{r}")
-        for t in range(num_teachers):
-            assign_teacher[(sec_i, subj_i, t)] = model.new_bool_var(f"teach_s{sec_i}_sub{subj_i}_t{t}")
-
-    # Room assignment: exactly one allowed room (respect labs)
+        # Durations are constant per subject, so fixed-size intervals avoid a separate end var
+        intervals[(sec_i, subj_i)] = model.new_fixed_size_interval_var(starts[(sec_i, subj_i)], dur, f"iv_s{sec_i}_sub{subj_i}")
+
+    # Room assignment: one IntVar per instance whose domain is the allowed rooms (respect labs)
     for sec_i, subj_i in all_instances:
         needs_lab = subjects[subj_i][3]
         if needs_lab:
             allowed_rooms = comlab_room_indices
         else:
             allowed_rooms = list(range(num_rooms))
-        model.add(sum(assign_room[(sec_i, subj_i, r)] for r in allowed_rooms) == 1)
+        room_of[(sec_i, subj_i)] = model.new_int_var_from_domain(cp_model.Domain.from_values(allowed_rooms), f"room_s{sec_i}_sub{subj_i}")
 
-    # Teacher assignment: exactly one teacher able to teach this subject
-    # Build map of teacher eligibility
-    subject_code_to_idx = {subjects[i][0]: i for i in range(len(subjects))}
+    # Teacher assignment: one IntVar per instance whose domain is the teachers able to teach this subject
+    # Build map of teacher eligibility once, not per instance
+    subject_to_teachers = defaultdict(list)
+    for t in teachers:
+        for sc in set(t.get("can_teach", ())):
+            subject_to_teachers[sc].append(t["id"])
     for sec_i, subj_i in all_instances:
-        scode = subjects[subj_i][0]
-        eligible_teacher_indices = [t["id"] for t in teachers if scode in t.get("can_teach", [])]
+        eligible_teacher_indices = subject_to_teachers[subjects[subj_i][0]]
         # if no eligible teachers, model would be infeasible; but precheck already checks this
-        model.add(sum(assign_teacher[(sec_i, subj_i, t)] for t in eligible_teacher_indices) == 1)
-
-    # Optional intervals per room to enforce no overlap
-    opt_intervals_by_room = {r: [] for r in range(num_rooms)}
-    for sec_i, subj_i in all_instances:
-        dur = subjects[subj_i][2]
-        for r in range(num_rooms):
-            opt_iv = model.new_optional_interval_var(starts[(sec_i, subj_i)], dur, ends[(sec_i, subj_i)], assign_room[(sec_i, subj_i, r)], f"opt_iv_s{sec_i}_sub{subj_i}_r{r}")
-            opt_intervals_by_room[r].append(opt_iv)
+        teacher_of[(sec_i, subj_i)] = model.new_int_var_from_domain(cp_model.Domain.from_values(eligible_teacher_indices), f"teacher_s{sec_i}_sub{subj_i}")
 
-    for r in range(num_rooms):
-        model.add_no_overlap(opt_intervals_by_room[r])
+    # No overlap per room: time x room rectangles (unit height on the room axis) must not intersect
+    room_rects = [model.new_fixed_size_interval_var(room_of[inst], 1, f"room_iv_s{inst[0]}_sub{inst[1]}") for inst in all_instances]
+    model.add_no_overlap_2d([intervals[inst] for inst in all_instances], room_rects)
 
     # No overlap per section (a section cannot have two classes at the same time)
     intervals_by_section = {s: [] for s in range(num_sections)}
@@ -193,52 +185,38 @@ def build_and_solve(sections=default_sections,
     for s in range(num_sections):
         model.add_no_overlap(intervals_by_section[s])
 
-    # No overlap per teacher (a teacher cannot teach two classes at the same time)
-    opt_intervals_by_teacher = {t: [] for t in range(num_teachers)}
-    for sec_i, subj_i in all_instances:
-        dur = subjects[subj_i][2]
-        for t in range(num_teachers):
-            # optional interval present iff teacher assigned
-            opt_iv = model.new_optional_interval_var(starts[(sec_i, subj_i)], dur, ends[(sec_i, subj_i)], assign_teacher[(sec_i, subj_i, t)], f"opt_iv_s{sec_i}_sub{subj_i}_t{t}")
-            opt_intervals_by_teacher[t].append(opt_iv)
-    for t in range(num_teachers):
-        model.add_no_overlap(opt_intervals_by_teacher[t])
+    # No overlap per teacher (a teacher cannot teach two classes at the same time), same 2D trick
+    teacher_rects = [model.new_fixed_size_interval_var(teacher_of[inst], 1, f"teacher_iv_s{inst[0]}_sub{inst[1]}") for inst in all_instances]
+    model.add_no_overlap_2d([intervals[inst] for inst in all_instances], teacher_rects)
 
     # (Optional) If you want to forbid classes crossing day boundaries, you should restrict starts per day.
     # Current model allows crossing day boundary; to forbid it you'd need additional constraints.
 
     # Solver
     solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = solver_time_limit_seconds
-    solver.parameters.num_search_workers = 8
+    options = solver_options or SolverOptions()
+    if solver_time_limit_seconds is not None:
+        options = replace(options, max_time=solver_time_limit_seconds)
+    options.apply(solver.parameters, default_time_limit=15, default_workers=cp_workers())
 
     status = solver.solve(model)
 
     if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
         raise RuntimeError(f"No feasible timetable found. Status: {status}")
 
-    # Extract solution
+    # Extract solution: room/teacher are read straight off their IntVars
+    # slot -> (day, hour) is fixed for this request, so tabulate it once
+    slot_to_dh = [slot_to_day_hour(slot, hours_per_day_local, start_hour_local) for slot in range(H)]
+    teacher_name_by_id = {t["id"]: t["name"] for t in reversed(teachers)}
     schedule_entries = []
     for sec_i, subj_i in all_instances:
         s_val = solver.Value(starts[(sec_i, subj_i)])
         dur = subjects[subj_i][2]
         e_val = s_val + dur
-        assigned_room = None
-        for r in range(num_rooms):
-            if solver.Value(assign_room[(sec_i, subj_i, r)]) == 1:
-                assigned_room = r
-                break
-        assigned_teacher = None
-        for t in range(num_teachers):
-            if solver.Value(assign_teacher[(sec_i, subj_i, t)]) == 1:
-                assigned_teacher = t
-                break
-        if assigned_room is None:
-            raise RuntimeError(f"Instance sec{sec_i} subj{subj_i} had no room assigned in solution.")
-        if assigned_teacher is None:
-            raise RuntimeError(f"Instance sec{sec_i} subj{subj_i} had no teacher assigned in solution.")
-        day_idx, start_hr = slot_to_day_hour(s_val, hours_per_day_local, start_hour_local)
-        end_day_idx, end_hr = slot_to_day_hour(e_val - 1, hours_per_day_local, start_hour_local)
+        assigned_room = solver.Value(room_of[(sec_i, subj_i)])
+        assigned_teacher = solver.Value(teacher_of[(sec_i, subj_i)])
+        day_idx, start_hr = slot_to_dh[s_val]
+        end_day_idx, end_hr = slot_to_dh[e_val - 1]
         schedule_entries.append({
             "section": sections[sec_i],
             "subject_code": subjects[subj_i][0],
@@ -252,22 +230,22 @@ def build_and_solve(sections=default_sections,
             "room": room_names[assigned_room],
             "duration": dur,
             "teacher_id": assigned_teacher,
-            "teacher_name": next((t["name"] for t in teachers if t["id"] == assigned_teacher), None),
+            "teacher_name": teacher_name_by_id.get(assigned_teacher),
         })
 
-    # Build per-day view
+    # Build per-day view. Walking entries in start order appends each day's runs already
+    # sorted: a carried-over run starts at the top of its day, before any run that begins there.
     per_day_entries = {d_idx: [] for d_idx in range(num_days)}
-    for ent in schedule_entries:
+    for ent in sorted(schedule_entries, key=itemgetter("start_slot")):
         s_slot = ent["start_slot"]
         e_slot = ent["end_slot_exclusive"]
         cur = s_slot
         while cur < e_slot:
-            day_idx = cur // hours_per_day_local
+            day_idx, start_hr = slot_to_dh[cur]
             run_start = cur
             day_end_slot = (day_idx + 1) * hours_per_day_local
             run_end = min(e_slot, day_end_slot)
-            start_hr = start_hour_local + (run_start % hours_per_day_local)
-            end_hr = start_hour_local + ((run_end - 1) % hours_per_day_local) + 1
+            end_hr = slot_to_dh[run_end - 1][1] + 1
             per_day_entries[day_idx].append({
                 "start_slot": run_start,
                 "start_hour": start_hr,
@@ -281,9 +259,6 @@ def build_and_solve(sections=default_sections,
             })
             cur = run_end
 
-    for d_idx in per_day_entries:
-        per_day_entries[d_idx].sort(key=lambda x: x["start_slot"])
-
     # Also produce per-section compact view
     per_section = {sec: [] for sec in sections}
     for ent in schedule_entries:
@@ -304,11 +279,58 @@ def build_and_solve(sections=default_sections,
     }
     return result
 
+# ----------------------------
+# Process-pool entry point
+# ----------------------------
+def _solve_sync(config: Optional[Dict[str, Any]] = None):
+    """
+    Top-level (picklable) solve used by the process pool.
+    `config` is a `SchedulerConfig.model_dump(exclude_none=True)` dict or None for the defaults.
+    """
+    config = config or {}
+
+    def pick(key, default):
+        value = config.get(key)
+        return value if value is not None else default
+
+    subjects = config.get("subjects")
+    return build_and_solve(sections=pick("sections", default_sections),
+                           subjects=[tuple(s) for s in subjects] if subjects is not None else default_subjects,
+                           room_names=pick("room_names", default_room_names),
+                           comlab_room_indices=pick("comlab_room_indices", default_comlab_room_indices),
+                           days=pick("days", default_days),
+                           teachers=pick("teachers", default_teachers),
+                           hours_per_day_local=pick("hours_per_day", hours_per_day),
+                           start_hour_local=start_hour)
+
+# ----------------------------
+# Result cache
+# ----------------------------
+# Solves are a pure function of the config, so identical configs reuse the last result.
+SCHEDULE_CACHE_SIZE = 32
+_schedule_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+
+def _config_key(config: Optional[Dict[str, Any]]) -> bytes:
+    return hashlib.blake2b(json.dumps(config or {}, sort_keys=True).encode(), digest_size=16).digest()
+
+async def _solve_cached(config: Optional[Dict[str, Any]]):
+    key = _config_key(config)
+    cached = _schedule_cache.get(key)
+    if cached is not None:
+        _schedule_cache.move_to_end(key)
+        return cached
+
+    result = await run_in_executor(_solve_sync, config)
+    _schedule_cache[key] = result
+    if len(_schedule_cache) > SCHEDULE_CACHE_SIZE:
+        _schedule_cache.popitem(last=False)
+    return result
+
 # ----------------------------
 # FastAPI endpoints
 # ----------------------------
 @app.post("/schedule")
-def post_schedule(config: Optional[SchedulerConfig] = None):
+async def post_schedule(config: Optional[SchedulerConfig] = None) -> Dict[str, Any]:
     """
     POST /schedule
     Optionally send JSON body with any of:
@@ -324,34 +346,9 @@ def post_schedule(config: Optional[SchedulerConfig] = None):
     If no body supplied, default built-in config is used.
     """
     try:
-        if config:
-            sections = config.sections if config.sections is not None else default_sections
-            subjects = [tuple(s) for s in config.subjects] if config.subjects is not None else default_subjects
-            room_names = config.room_names if config.room_names is not None else default_room_names
-            comlab_room_indices = config.comlab_room_indices if config.comlab_room_indices is not None else default_comlab_room_indices
-            days = config.days if config.days is not None else default_days
-            teachers = config.teachers if config.teachers is not None else default_teachers
-            hours_pd = config.hours_per_day if config.hours_per_day is not None else hours_per_day
-        else:
-            sections = default_sections
-            subjects = default_subjects
-            room_names = default_room_names
-            comlab_room_indices = default_comlab_room_indices
-            days = default_days
-            teachers = default_teachers
-            hours_pd = hours_per_day
-
-        # Build & solve
-        result = build_and_solve(sections=sections,
-                                 subjects=subjects,
-                                 room_names=room_names,
-                                 comlab_room_indices=comlab_room_indices,
-                                 days=days,
-                                 teachers=teachers,
-                                 hours_per_day_local=hours_pd,
-                                 start_hour_local=start_hour,
-                                 solver_time_limit_seconds=15)
-        return result
+        # Build & solve in the process pool so the event loop stays free (cached per config)
+        # The declared return type lets FastAPI serialize via Pydantic (int day keys become strings)
+        return await _solve_cached(config.model_dump(exclude_none=True) if config else None)
     except ValueError as ve:
         # precheck errors
         raise HTTPException(status_code=400, detail=str(ve))
@@ -361,18 +358,18 @@ def post_schedule(config: Optional[SchedulerConfig] = None):
         raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
 
 @app.get("/schedule")
-def get_schedule():
+async def get_schedule() -> Dict[str, Any]:
     """
     GET /schedule
     Runs the scheduler with default built-in configuration and returns JSON result.
     """
-    return post_schedule(None)
+    return await post_schedule(None)
 
 # ----------------------------
 # If run directly, print a human-friendly timetable to console as well
 # ----------------------------
 if __name__ == "__main__":
-    import json, sys
+    import sys
     try:
         result = build_and_solve()
     except ValueError as ve:
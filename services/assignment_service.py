@@ -1,14 +1,129 @@
 # app/services/AssignScheduling.py
+import heapq
+import math
 from ortools.sat.python import cp_model
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from models.scheduling_model import Course, Instructor, CourseAssignment
+from utils.executor import DEPT_POOL, map_in_executor
+from utils.solver_settings import SolverOptions, dept_cp_workers
+
+
+# Hot loops work on plain tuples extracted once from the Pydantic models
+CourseRow = Tuple[str, int]  # (course id, units)
+
+# Plain assignment models gain little from probing, so skip it by default
+DEFAULT_ASSIGNMENT_OPTIONS = SolverOptions(cp_model_probing_level=0)
+
+
+def lpt_balance(courses: List[CourseRow], instructor_ids: List[str]) -> Dict[str, str]:
+    """Greedy longest-processing-time balance: biggest course goes to the least-loaded instructor."""
+    heap = [(0, k) for k in range(len(instructor_ids))]
+    greedy = {}
+    for c_id, units in sorted(courses, key=lambda c: c[1], reverse=True):
+        load, k = heapq.heappop(heap)
+        greedy[c_id] = instructor_ids[k]
+        heapq.heappush(heap, (load + units, k))
+    return greedy
+
+
+def solve_department(courses: List[CourseRow], instructor_ids: List[str],
+                     options: SolverOptions = DEFAULT_ASSIGNMENT_OPTIONS) -> List[CourseAssignment]:
+    """Balance one department's courses across its instructors (top-level so it can run in the process pool)."""
+    greedy = lpt_balance(courses, instructor_ids)
+
+    # With equal units the greedy spread is already optimal, no need for CP-SAT
+    if len({units for _, units in courses}) <= 1:
+        return [CourseAssignment(course_id=c_id, instructor_id=greedy[c_id]) for c_id, _ in courses]
+
+    # Tight bounds for max_load: the perfect split below, the greedy solution above
+    greedy_loads = dict.fromkeys(instructor_ids, 0)
+    for c_id, units in courses:
+        greedy_loads[greedy[c_id]] += units
+    total = sum(units for _, units in courses)
+    lower = math.ceil(total / len(instructor_ids))
+    upper = max(greedy_loads.values())
+    greedy_min = min(greedy_loads.values())
+    # Greedy already hits the perfect split on both ends
+    if upper == lower and greedy_min == total // len(instructor_ids):
+        return [CourseAssignment(course_id=c_id, instructor_id=greedy[c_id]) for c_id, _ in courses]
+
+    model = cp_model.CpModel()
+    num_insts = len(instructor_ids)
+    inst_idx = {i_id: ii for ii, i_id in enumerate(instructor_ids)}
+
+    # Binary variables indexed by position: assign_vars[ci][ii]
+    assign_vars = [
+        [model.NewBoolVar(f"assign_{ci}_{ii}") for ii in range(num_insts)]
+        for ci in range(len(courses))
+    ]
+
+    # Each course must be assigned to exactly one instructor
+    for row in assign_vars:
+        model.AddExactlyOne(row)
+
+    # Compute total units per instructor
+    unit_coeffs = [units for _, units in courses]
+    total_units = []
+    for ii in range(num_insts):
+        t = model.NewIntVar(0, upper, f"total_units_{ii}")
+        model.Add(t == cp_model.LinearExpr.WeightedSum([row[ii] for row in assign_vars], unit_coeffs))
+        total_units.append(t)
+
+    # Balance loads: minimize the max load first, then raise the min load so nobody is left idle.
+    # min_load <= upper, so weighting max_load by upper + 1 keeps the two levels apart.
+    max_load = model.NewIntVar(lower, upper, "max_load")
+    min_load = model.NewIntVar(0, total // num_insts, "min_load")
+    model.AddMaxEquality(max_load, total_units)
+    model.AddMinEquality(min_load, total_units)
+
+    weight = upper + 1
+    model.Minimize(max_load * weight - min_load)
+
+    # Warm-start from the greedy assignment
+    for ci, (c_id, _) in enumerate(courses):
+        hinted = inst_idx[greedy[c_id]]
+        for ii, var in enumerate(assign_vars[ci]):
+            model.AddHint(var, 1 if ii == hinted else 0)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.repair_hint = True
+    solver.parameters.fix_variables_to_their_hinted_value = False
+    options.apply(solver.parameters, default_time_limit=5, default_workers=dept_cp_workers())
+    solver.parameters.log_search_progress = False
+    status = solver.Solve(model)
+
+    # Keep the greedy spread unless CP-SAT found a strictly better one
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE) or solver.ObjectiveValue() >= upper * weight - greedy_min:
+        return [CourseAssignment(course_id=c_id, instructor_id=greedy[c_id]) for c_id, _ in courses]
+
+    # Exactly one instructor per course is set, so stop reading at the first one
+    assignments = []
+    for ci, (c_id, _) in enumerate(courses):
+        ii = next((ii for ii, var in enumerate(assign_vars[ci]) if solver.BooleanValue(var)), None)
+        if ii is not None:
+            assignments.append(CourseAssignment(course_id=c_id, instructor_id=instructor_ids[ii]))
+    return assignments
 
 
 class AssignmentService:
-    def __init__(self):
-        self.model = cp_model.CpModel()
+    def __init__(self, options: Optional[SolverOptions] = None):
+        self.options = options or DEFAULT_ASSIGNMENT_OPTIONS
 
     def assign_courses(self, courses: List[Course], instructors: List[Instructor]) -> List[CourseAssignment]:
+        # Departments share no variables, so solve them in parallel across the department pool
+        results = map_in_executor(
+            solve_department,
+            [(dept_courses, insts, self.options) for _, dept_courses, insts in self.plan_departments(courses, instructors)],
+            pool=DEPT_POOL,
+        )
+
+        assignments = []
+        for dept_assignments in results:
+            assignments.extend(dept_assignments)
+        return assignments
+
+    def plan_departments(self, courses: List[Course], instructors: List[Instructor]) -> List[Tuple[str, List[CourseRow], List[str]]]:
+        """Split the input into independent (dept_id, courses, instructor_ids) jobs for solve_department."""
         # ✅ Deduplicate instructors by user_id safely
         unique_instructors = {}
         for inst in instructors:
@@ -23,12 +138,12 @@ class AssignmentService:
         # Replace with unique list
         instructors = list(unique_instructors.values())
 
-        # ✅ Group instructors by department
+        # ✅ Group instructor ids by department
         dept_instructors = {}
         for inst in instructors:
-            dept_instructors.setdefault(inst.dept_id, []).append(inst)
+            dept_instructors.setdefault(inst.dept_id, []).append(inst.id)
 
-        assignments = []
+        jobs = []
 
         for dept_id, dept_courses in self._group_courses_by_dept(courses).items():
             if dept_id not in dept_instructors:
@@ -37,51 +152,12 @@ class AssignmentService:
             insts = dept_instructors[dept_id]
             print(f"Assigning {len(dept_courses)} courses for dept {dept_id} to {len(insts)} instructors")
 
-            assignments.extend(self._assign_department_courses(dept_courses, insts))
+            jobs.append((dept_id, dept_courses, insts))
 
-        return assignments
+        return jobs
 
-    def _group_courses_by_dept(self, courses: List[Course]):
+    def _group_courses_by_dept(self, courses: List[Course]) -> Dict[str, List[CourseRow]]:
         grouped = {}
         for c in courses:
-            grouped.setdefault(c.dept_id, []).append(c)
+            grouped.setdefault(c.dept_id, []).append((c.id, c.units))
         return grouped
-
-    def _assign_department_courses(self, courses: List[Course], instructors: List[Instructor]):
-        model = cp_model.CpModel()
-
-        # Binary variables: assign_{course.id}_{inst.id}
-        assign_vars = {
-            (c.id, i.id): model.NewBoolVar(f"assign_{c.id}_{i.id}")
-            for c in courses for i in instructors
-        }
-
-        # Each course must be assigned to exactly one instructor
-        for c in courses:
-            model.Add(sum(assign_vars[(c.id, i.id)] for i in instructors) == 1)
-
-        # Compute total units per instructor
-        total_units = {}
-        for i in instructors:
-            total_units[i.id] = model.NewIntVar(0, sum(c.units for c in courses), f"total_units_{i.id}")
-            model.Add(total_units[i.id] == sum(assign_vars[(c.id, i.id)] * c.units for c in courses))
-
-        # Balance loads: minimize max load difference
-        max_load = model.NewIntVar(0, 100, "max_load")
-        min_load = model.NewIntVar(0, 100, "min_load")
-        for t in total_units.values():
-            model.Add(t <= max_load)
-            model.Add(t >= min_load)
-
-        model.Minimize(max_load - min_load)
-
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 5
-        solver.Solve(model)
-
-        assignments = []
-        for c in courses:
-            for i in instructors:
-                if solver.BooleanValue(assign_vars[(c.id, i.id)]):
-                    assignments.append(CourseAssignment(course_id=c.id, instructor_id=i.id))
-        return assignments
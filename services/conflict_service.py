@@ -1,21 +1,43 @@
 from models.scheduling_model import ScheduleData, ConflictRequest
-from datetime import datetime, timedelta
-from typing import List, Tuple, Dict
+from typing import List, Optional, Tuple, Dict
+import re
+from functools import lru_cache
+from operator import attrgetter, itemgetter
 
-def parse_time(t: str) -> datetime:
-    """Parse time in either HH:MM or HH:MM:SS format."""
-    try:
-        return datetime.strptime(t, "%H:%M:%S")
-    except ValueError:
-        return datetime.strptime(t, "%H:%M")
+# Fallback for loosely formatted input such as "8:00"
+_TIME_RE = re.compile(r"(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?")
+
+# Schedules reuse a handful of bell times, so memoize the parsed values
+@lru_cache(maxsize=256)
+def parse_time(t: str) -> int:
+    """Parse time in either HH:MM or HH:MM:SS format into minutes since midnight."""
+    length = len(t)
+    if (length == 5 or (length == 8 and t[5] == ":" and t[6:8].isdigit())) and t[2] == ":" and t[:2].isdigit() and t[3:5].isdigit():
+        hours, minutes = int(t[0:2]), int(t[3:5])
+        seconds = int(t[6:8]) if length == 8 else 0
+    else:
+        match = _TIME_RE.fullmatch(t)
+        if match is None:
+            raise ValueError(f"time data {t!r} does not match format 'HH:MM[:SS]'")
+        hours, minutes = int(match.group(1)), int(match.group(2))
+        seconds = int(match.group(3) or 0)
+    if hours > 23 or minutes > 59 or seconds > 61:
+        raise ValueError(f"time data {t!r} is out of range")
+    return hours * 60 + minutes
+
+# 12-hour clock hour and AM/PM suffix, indexed by hour of day
+_HOUR_12 = tuple((h % 12 or 12, "AM" if h < 12 else "PM") for h in range(24))
+
+def format_time_ampm_int(minutes: int) -> str:
+    """Format minutes since midnight as 12-hour AM/PM time, e.g. 810 -> '1:30 PM'."""
+    h, m = divmod(minutes, 60)
+    h12, suffix = _HOUR_12[h]
+    return f"{h12}:{m:02d} {suffix}"
 
 def format_time_ampm(time_str: str) -> str:
     """Convert 24-hour time format to 12-hour AM/PM format."""
     try:
-        # Parse the time
-        time_obj = parse_time(time_str)
-        # Format to AM/PM
-        return time_obj.strftime("%I:%M %p").lstrip('0')
+        return format_time_ampm_int(parse_time(time_str))
     except ValueError:
         return time_str  # Return original if parsing fails
 
@@ -37,20 +59,18 @@ def format_suggestions_message(vacant_slots: List[Dict]) -> str:
         return "Available time slots: " + ", ".join(messages)
     return ""
 
-def get_vacant_slots(occupied_slots: List[Tuple[datetime, datetime]], day_start: datetime, day_end: datetime, lunch_start: datetime, lunch_end: datetime) -> List[Dict]:
-    """Find vacant time slots between occupied periods."""
+def get_vacant_slots(occupied_slots: List[Tuple[int, int]], day_start: int, day_end: int, lunch_start: int, lunch_end: int) -> List[Tuple[int, int]]:
+    """Find vacant (start, end) periods between occupied ones (times in minutes since midnight)."""
     vacant_slots = []
     
-    # Sort occupied slots by start time
-    occupied_slots.sort(key=lambda x: x[0])
+    # Sort occupied slots by start time, unless they already arrive in order
+    if any(occupied_slots[i][0] > occupied_slots[i + 1][0] for i in range(len(occupied_slots) - 1)):
+        occupied_slots.sort(key=itemgetter(0))
     
     # Check before first occupied slot
     first_occupied_start = occupied_slots[0][0] if occupied_slots else day_end
     if day_start < first_occupied_start:
-        vacant_slots.append({
-            "start": format_time_ampm(day_start.strftime("%H:%M")),
-            "end": format_time_ampm(first_occupied_start.strftime("%H:%M"))
-        })
+        vacant_slots.append((day_start, first_occupied_start))
     
     # Check between occupied slots and around lunch
     for i in range(len(occupied_slots) - 1):
@@ -65,45 +85,59 @@ def get_vacant_slots(occupied_slots: List[Tuple[datetime, datetime]], day_start:
         if current_end <= lunch_start and next_start >= lunch_end:
             # Time before lunch
             if current_end < lunch_start:
-                vacant_slots.append({
-                    "start": format_time_ampm(current_end.strftime("%H:%M")),
-                    "end": format_time_ampm(lunch_start.strftime("%H:%M"))
-                })
+                vacant_slots.append((current_end, lunch_start))
             # Time after lunch
             if lunch_end < next_start:
-                vacant_slots.append({
-                    "start": format_time_ampm(lunch_end.strftime("%H:%M")),
-                    "end": format_time_ampm(next_start.strftime("%H:%M"))
-                })
+                vacant_slots.append((lunch_end, next_start))
         else:
             # Regular gap between classes
             if current_end < next_start:
-                vacant_slots.append({
-                    "start": format_time_ampm(current_end.strftime("%H:%M")),
-                    "end": format_time_ampm(next_start.strftime("%H:%M"))
-                })
+                vacant_slots.append((current_end, next_start))
     
     # Check after last occupied slot
     if occupied_slots:
         last_occupied_end = occupied_slots[-1][1]
         if last_occupied_end < day_end:
-            vacant_slots.append({
-                "start": format_time_ampm(last_occupied_end.strftime("%H:%M")),
-                "end": format_time_ampm(day_end.strftime("%H:%M"))
-            })
+            vacant_slots.append((last_occupied_end, day_end))
     else:
         # No occupied slots - entire day is vacant (except lunch)
-        vacant_slots.append({
-            "start": format_time_ampm(day_start.strftime("%H:%M")),
-            "end": format_time_ampm(lunch_start.strftime("%H:%M"))
-        })
-        vacant_slots.append({
-            "start": format_time_ampm(lunch_end.strftime("%H:%M")),
-            "end": format_time_ampm(day_end.strftime("%H:%M"))
-        })
+        vacant_slots.append((day_start, lunch_start))
+        vacant_slots.append((lunch_end, day_end))
     
     return vacant_slots
 
+def format_slots(slots: List[Tuple[int, int]]) -> List[Dict[str, str]]:
+    """Format (start, end) minute ranges as AM/PM start/end dicts for the response."""
+    return [{"start": format_time_ampm_int(start), "end": format_time_ampm_int(end)} for start, end in slots]
+
+def _candidates(new: ScheduleData, new_days: frozenset, schedules: List[ScheduleData], start_new: int, end_new: int) -> Tuple[List[Tuple[ScheduleData, int, int]], Optional[int]]:
+    """
+    Schedules in new's academic year and trimester that share a day and its room or instructor,
+    as (schedule, start, end) in input order, plus the position of the first one overlapping in time.
+    """
+    rows = []
+    first = None
+    for existing in schedules:
+        if (existing.academic_year_id == new.academic_year_id
+                and existing.trimester_id == new.trimester_id
+                and (existing.room_id == new.room_id or existing.instructor_id == new.instructor_id)
+                and not new_days.isdisjoint(existing.days)):
+            start, end = parse_time(existing.start_time), parse_time(existing.end_time)
+            if first is None and start < end_new and end > start_new:
+                first = len(rows)
+            rows.append((existing, start, end))
+    return rows, first
+
+def _occupied_by_day(rows: List[Tuple[ScheduleData, int, int]], key: attrgetter, value: str, days: List[str]) -> Dict[str, List[Tuple[int, int]]]:
+    """Occupied (start, end) times per day for one room or instructor, limited to `days`."""
+    by_day = {}
+    for existing, start, end in rows:
+        if key(existing) == value:
+            for day in existing.days:
+                if day in days:
+                    by_day.setdefault(day, []).append((start, end))
+    return by_day
+
 def check_schedule_conflict_logic(request: ConflictRequest) -> dict:
     """Check if the new schedule conflicts with existing ones."""
     new = request.new_schedule
@@ -138,137 +172,95 @@ def check_schedule_conflict_logic(request: ConflictRequest) -> dict:
             "suggestions": ""
         }
 
-    # Group existing schedules by room and day for vacancy suggestions
-    room_schedules_by_day = {}
-    instructor_schedules_by_day = {}
-    
-    for existing in request.existing_schedules:
-        # Only consider same academic year and trimester
-        if not (existing.academic_year_id == new.academic_year_id and existing.trimester_id == new.trimester_id):
-            continue
-            
-        # Group by room and day
-        if existing.room_id not in room_schedules_by_day:
-            room_schedules_by_day[existing.room_id] = {}
+    # Only schedules in the same academic year and trimester that share a day and the room
+    # or instructor can conflict, and only those feed the vacancy suggestions: one filter
+    # pass keeps them in input order. The first of them that overlaps in time decides the
+    # reported conflict, room before instructor.
+    # new's days are built into a set once, for the filter and for the conflict message
+    new_days = frozenset(new.days)
+    rows, k = _candidates(new, new_days, request.existing_schedules, start_new, end_new)
+    if k is not None:
+        existing = rows[k][0]
+        overlapping_days = [day for day in dict.fromkeys(existing.days) if day in new_days]
+
+        # Format date and time for conflict message with AM/PM
+        conflict_days = ", ".join(overlapping_days)
+        conflict_time = f"{format_time_ampm(existing.start_time)}-{format_time_ampm(existing.end_time)}"
+        
+        # Use instructor name or fallback to ID
+        instructor_display_name = existing.instructor_name or f"Instructor {existing.instructor_id}"
+        # Use room name or fallback to ID
+        room_display_name = existing.room_name or f"Room {existing.room_id}"
         
-        # Group by instructor and day  
-        if existing.instructor_id not in instructor_schedules_by_day:
-            instructor_schedules_by_day[existing.instructor_id] = {}
+        # Room conflict
+        if existing.room_id == new.room_id:
+            # Get vacant slots for this room on conflict days
+            room_schedules_by_day = _occupied_by_day(rows, attrgetter("room_id"), existing.room_id, overlapping_days)
+            vacant_slots = []
+            for day in overlapping_days:
+                if day in room_schedules_by_day:
+                    
+                    day_vacant_slots = get_vacant_slots(
+                        room_schedules_by_day[day],
+                        school_start, school_end, lunch_start, lunch_end
+                    )
+                    if day_vacant_slots:
+                        vacant_slots.append({
+                            "day": day,
+                            "slots": format_slots(day_vacant_slots)
+                        })
             
-        for day in existing.days:
-            # Initialize day if not exists
-            if day not in room_schedules_by_day[existing.room_id]:
-                room_schedules_by_day[existing.room_id][day] = []
-            if day not in instructor_schedules_by_day[existing.instructor_id]:
-                instructor_schedules_by_day[existing.instructor_id][day] = []
-                
-            # Add schedule time slots
-            room_schedules_by_day[existing.room_id][day].append(
-                (parse_time(existing.start_time), parse_time(existing.end_time))
-            )
-            instructor_schedules_by_day[existing.instructor_id][day].append(
-                (parse_time(existing.start_time), parse_time(existing.end_time))
-            )
-
-    for existing in request.existing_schedules:
-        # Check if they belong to the same academic year and trimester
-        if not (
-            existing.academic_year_id == new.academic_year_id
-            and existing.trimester_id == new.trimester_id
-        ):
-            continue
-
-        # Check overlapping days
-        overlapping_days = set(existing.days) & set(new.days)
-        if not overlapping_days:
-            continue
-
-        # Parse time ranges safely
-        start_exist = parse_time(existing.start_time)
-        end_exist = parse_time(existing.end_time)
-
-        # Check for time overlap
-        overlap = start_new < end_exist and end_new > start_exist
+            # Create SEPARATE messages
+            conflict_message = f"Room Conflict: The selected room {room_display_name} is already occupied on {conflict_days} {conflict_time}."
+            suggestions_message = format_suggestions_message(vacant_slots)
+            
+            return {
+                "conflict": True,
+                "type": "room",
+                "message": conflict_message,  # Main conflict message
+                "suggestions": suggestions_message,  # Separate suggestions message
+                "conflicting_instructor_id": existing.instructor_id,
+                "conflicting_instructor_name": existing.instructor_name,
+                "conflicting_room_id": existing.room_id,
+                "conflicting_room_name": existing.room_name,
+                "days": overlapping_days,
+                "time": conflict_time,
+                "vacant_slots": vacant_slots if vacant_slots else None
+            }
 
-        if overlap:
-            # Format date and time for conflict message with AM/PM
-            conflict_days = ", ".join(overlapping_days)
-            conflict_time = f"{format_time_ampm(existing.start_time)}-{format_time_ampm(existing.end_time)}"
+        # Instructor conflict
+        if existing.instructor_id == new.instructor_id:
+            # Get vacant slots for this instructor on conflict days
+            instructor_schedules_by_day = _occupied_by_day(rows, attrgetter("instructor_id"), existing.instructor_id, overlapping_days)
+            vacant_slots = []
+            for day in overlapping_days:
+                if day in instructor_schedules_by_day:
+                    
+                    day_vacant_slots = get_vacant_slots(
+                        instructor_schedules_by_day[day],
+                        school_start, school_end, lunch_start, lunch_end
+                    )
+                    if day_vacant_slots:
+                        vacant_slots.append({
+                            "day": day,
+                            "slots": format_slots(day_vacant_slots)
+                        })
             
-            # Use instructor name or fallback to ID
-            instructor_display_name = existing.instructor_name or f"Instructor {existing.instructor_id}"
-            # Use room name or fallback to ID
-            room_display_name = existing.room_name or f"Room {existing.room_id}"
+            # Create SEPARATE messages
+            conflict_message = f"Instructor Conflict: {instructor_display_name} has schedule on {conflict_days} at {conflict_time}"
+            suggestions_message = format_suggestions_message(vacant_slots)
             
-            # Room conflict
-            if existing.room_id == new.room_id:
-                # Get vacant slots for this room on conflict days
-                vacant_slots = []
-                for day in overlapping_days:
-                    if (existing.room_id in room_schedules_by_day and 
-                        day in room_schedules_by_day[existing.room_id]):
-                        
-                        day_vacant_slots = get_vacant_slots(
-                            room_schedules_by_day[existing.room_id][day],
-                            school_start, school_end, lunch_start, lunch_end
-                        )
-                        if day_vacant_slots:
-                            vacant_slots.append({
-                                "day": day,
-                                "slots": day_vacant_slots
-                            })
-                
-                # Create SEPARATE messages
-                conflict_message = f"Room Conflict: The selected room {room_display_name} is already occupied on {conflict_days} {conflict_time}."
-                suggestions_message = format_suggestions_message(vacant_slots)
-                
-                return {
-                    "conflict": True,
-                    "type": "room",
-                    "message": conflict_message,  # Main conflict message
-                    "suggestions": suggestions_message,  # Separate suggestions message
-                    "conflicting_instructor_id": existing.instructor_id,
-                    "conflicting_instructor_name": existing.instructor_name,
-                    "conflicting_room_id": existing.room_id,
-                    "conflicting_room_name": existing.room_name,
-                    "days": list(overlapping_days),
-                    "time": conflict_time,
-                    "vacant_slots": vacant_slots if vacant_slots else None
-                }
-
-            # Instructor conflict
-            if existing.instructor_id == new.instructor_id:
-                # Get vacant slots for this instructor on conflict days
-                vacant_slots = []
-                for day in overlapping_days:
-                    if (existing.instructor_id in instructor_schedules_by_day and 
-                        day in instructor_schedules_by_day[existing.instructor_id]):
-                        
-                        day_vacant_slots = get_vacant_slots(
-                            instructor_schedules_by_day[existing.instructor_id][day],
-                            school_start, school_end, lunch_start, lunch_end
-                        )
-                        if day_vacant_slots:
-                            vacant_slots.append({
-                                "day": day,
-                                "slots": day_vacant_slots
-                            })
-                
-                # Create SEPARATE messages
-                conflict_message = f"Instructor Conflict: {instructor_display_name} has schedule on {conflict_days} at {conflict_time}"
-                suggestions_message = format_suggestions_message(vacant_slots)
-                
-                return {
-                    "conflict": True,
-                    "type": "instructor",
-                    "message": conflict_message,  # Main conflict message
-                    "suggestions": suggestions_message,  # Separate suggestions message
-                    "conflicting_instructor_id": existing.instructor_id,
-                    "conflicting_instructor_name": existing.instructor_name,
-                    "days": list(overlapping_days),
-                    "time": conflict_time,
-                    "vacant_slots": vacant_slots if vacant_slots else None
-                }
+            return {
+                "conflict": True,
+                "type": "instructor",
+                "message": conflict_message,  # Main conflict message
+                "suggestions": suggestions_message,  # Separate suggestions message
+                "conflicting_instructor_id": existing.instructor_id,
+                "conflicting_instructor_name": existing.instructor_name,
+                "days": overlapping_days,
+                "time": conflict_time,
+                "vacant_slots": vacant_slots if vacant_slots else None
+            }
 
     # No conflict found
     return {
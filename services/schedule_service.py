@@ -1,6 +1,17 @@
+from functools import lru_cache
 from typing import List
-from datetime import datetime, timedelta
-from .models.scheduling_model import Course, CourseAssignment
+from models.scheduling_model import Course, CourseAssignment
+
+WEEK_DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday")
+
+
+@lru_cache(maxsize=8)
+def _gen_weekly(start_hour: int, end_hour: int):
+    # Cached and shared between calls: treat the slot dicts as read-only
+    return tuple(
+        {"day": day, "start": f"{h:02d}:00", "end": f"{(h + 1) % 24:02d}:00"}
+        for day in WEEK_DAYS for h in range(start_hour, end_hour)
+    )
 
 
 class ScheduleService:
@@ -9,19 +20,7 @@ class ScheduleService:
 
     def generate_weekly_timeslots(self, start_hour=7, end_hour=17):
         """Generate all 1-hour time slots Monday–Saturday (7AM–5PM)."""
-        days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
-        timeslots = []
-        for day in days:
-            start = datetime.strptime(f"{start_hour}:00", "%H:%M")
-            while start.hour < end_hour:
-                end = start + timedelta(hours=1)
-                timeslots.append({
-                    "day": day,
-                    "start": start.strftime("%H:%M"),
-                    "end": end.strftime("%H:%M")
-                })
-                start = end
-        return timeslots
+        return list(_gen_weekly(start_hour, end_hour))
 
     def generate_schedule(self, assignments: List[CourseAssignment], courses: List[Course]):
         """
@@ -31,9 +30,12 @@ class ScheduleService:
         timeslots = self.generate_weekly_timeslots(start_hour=7, end_hour=17)
         schedule = []
         slot_index = 0  # start from the first available time
+        course_by_id = {}
+        for c in courses:
+            course_by_id.setdefault(c.id, c)  # first match wins, as with a linear search
 
         for assign in assignments:
-            course = next((c for c in courses if c.id == assign.course_id), None)
+            course = course_by_id.get(assign.course_id)
             if not course:
                 continue
 
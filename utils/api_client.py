@@ -1,17 +1,87 @@
+import asyncio
+import importlib.util
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:  # only needed by AsyncLaravelAPIClient
+    httpx = None
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 30)
 
 class LaravelAPIClient:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, timeout=DEFAULT_TIMEOUT):
         self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        # One pooled keep-alive session for every call instead of a new connection each time
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            # raise_on_status=False hands the last 5xx back to raise_for_status() as an HTTPError
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504), raise_on_status=False),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def get(self, endpoint: str):
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        response = requests.get(url)
+        response = self.session.get(url, timeout=self.timeout)
         response.raise_for_status()
         return response.json()
 
     def post(self, endpoint: str, data: dict):
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        response = requests.post(url, json=data)
+        response = self.session.post(url, json=data, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncLaravelAPIClient:
+    """httpx-based client for fetching several Laravel endpoints concurrently."""
+
+    def __init__(self, base_url: str, timeout=DEFAULT_TIMEOUT):
+        if httpx is None:
+            raise RuntimeError("AsyncLaravelAPIClient requires httpx (pip install httpx)")
+        connect, read = timeout
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            timeout=httpx.Timeout(read, connect=connect),
+            # HTTP/2 multiplexes the concurrent requests over one connection when h2 is installed
+            http2=importlib.util.find_spec("h2") is not None,
+        )
+
+    async def get(self, endpoint: str):
+        response = await self.client.get(f"/{endpoint.lstrip('/')}")
+        response.raise_for_status()
+        return response.json()
+
+    async def post(self, endpoint: str, data: dict):
+        response = await self.client.post(f"/{endpoint.lstrip('/')}", json=data)
         response.raise_for_status()
         return response.json()
+
+    async def get_many(self, endpoints):
+        """GET all endpoints concurrently; results come back in the same order."""
+        return await asyncio.gather(*(self.get(e) for e in endpoints))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
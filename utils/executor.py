@@ -0,0 +1,65 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils.solver_settings import cp_workers, dept_cp_workers
+
+SCHEDULE_POOL = "schedule"
+DEPT_POOL = "dept"
+
+# Pool name -> worker count.
+# Each CP-SAT solve already runs cp_workers() search threads, so size the pool
+# to keep concurrent solves from oversubscribing the machine.
+# Department assignment solves run only dept_cp_workers() threads each, so they get their own,
+# wider pool; this also keeps them from queueing behind schedule solves.
+_POOL_SIZES = {
+    SCHEDULE_POOL: lambda: max(1, (os.cpu_count() or 1) // cp_workers()),
+    DEPT_POOL: lambda: max(1, (os.cpu_count() or 1) // dept_cp_workers()),
+}
+
+# Pools are created on first use and replaced if a worker dies, which breaks the whole pool
+_pools = {}
+
+
+def get_executor(pool: str = SCHEDULE_POOL) -> ProcessPoolExecutor:
+    executor = _pools.get(pool)
+    if executor is None:
+        executor = _pools[pool] = ProcessPoolExecutor(max_workers=_POOL_SIZES[pool]())
+    return executor
+
+
+def _discard(pool: str, broken: ProcessPoolExecutor) -> None:
+    # Concurrent callers can all hit the same broken pool; only the first one drops it
+    if _pools.get(pool) is broken:
+        del _pools[pool]
+        broken.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_in_executor(func, *args, pool: str = SCHEDULE_POOL):
+    """Run a blocking (CP-SAT) call in a process pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    executor = get_executor(pool)
+    try:
+        return await loop.run_in_executor(executor, func, *args)
+    except BrokenProcessPool:
+        # A worker was killed (OOM, solver crash): start a fresh pool and retry once
+        _discard(pool, executor)
+        return await loop.run_in_executor(get_executor(pool), func, *args)
+
+
+def map_in_executor(func, jobs, pool: str = SCHEDULE_POOL) -> list:
+    """Blocking counterpart of run_in_executor for a batch of argument tuples; results keep job order."""
+    executor = get_executor(pool)
+    try:
+        return [f.result() for f in [executor.submit(func, *args) for args in jobs]]
+    except BrokenProcessPool:
+        _discard(pool, executor)
+        executor = get_executor(pool)
+        return [f.result() for f in [executor.submit(func, *args) for args in jobs]]
+
+
+def shutdown_executors() -> None:
+    """Shut down every pool; called when the app stops."""
+    for executor in _pools.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _pools.clear()
@@ -0,0 +1,61 @@
+import os
+import warnings
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+# CP-SAT is tuned for up to 16 parallel search workers.
+MAX_CP_WORKERS = 16
+
+# Departments are solved side by side, so each solve gets a small share of CP-SAT workers
+DEPT_CP_WORKERS = 4
+
+
+@lru_cache(maxsize=None)
+def _env_number(name: str, cast):
+    """Parse a numeric env override once; a malformed value is ignored with a warning, never raised."""
+    value = os.environ.get(name)
+    if not value:
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        warnings.warn(f"Ignoring {name}={value!r}: expected {cast.__name__}, using the default instead.", RuntimeWarning)
+        return None
+
+
+def cp_workers() -> int:
+    """Number of CP-SAT search workers per solve (env: SCHEDAI_CP_WORKERS)."""
+    value = _env_number("SCHEDAI_CP_WORKERS", int)
+    if value is not None:
+        return max(1, value)
+    return min(MAX_CP_WORKERS, os.cpu_count() or 8)
+
+
+def dept_cp_workers() -> int:
+    """Number of CP-SAT search workers per department assignment solve."""
+    return min(DEPT_CP_WORKERS, cp_workers())
+
+
+def cp_time_limit(default: float) -> float:
+    """Per-solve time limit in seconds (env: SCHEDAI_CP_TIME_LIMIT), else the caller's default."""
+    value = _env_number("SCHEDAI_CP_TIME_LIMIT", float)
+    return value if value is not None else default
+
+
+@dataclass(frozen=True)
+class SolverOptions:
+    """CP-SAT overrides for one solver; None keeps the solve's own default."""
+    num_workers: Optional[int] = None
+    max_time: Optional[float] = None
+    linearization_level: Optional[int] = None
+    cp_model_probing_level: Optional[int] = None
+    core_minimization_level: Optional[int] = None
+
+    def apply(self, parameters, default_time_limit: float, default_workers: int) -> None:
+        parameters.num_workers = self.num_workers or default_workers
+        parameters.max_time_in_seconds = self.max_time if self.max_time is not None else cp_time_limit(default_time_limit)
+        for name in ("linearization_level", "cp_model_probing_level", "core_minimization_level"):
+            value = getattr(self, name)
+            if value is not None:
+                setattr(parameters, name, value)